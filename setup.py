@@ -1,9 +1,26 @@
+import os.path
+import sys
+
 from setuptools import find_packages, setup
 
+# Cythonが利用でき、.pyxが同梱されている場合のみ高速バインディングを
+# ビルドします。ビルドしない場合もctypes実装で動作します。
+PYX_PATH = "src/powdeviceinfo/_cfgmgr_cy.pyx"
+
+ext_modules = []
+if sys.platform == "win32" and os.path.exists(PYX_PATH):
+    try:
+        from Cython.Build import cythonize
+
+        ext_modules = cythonize(PYX_PATH)
+    except ImportError:
+        pass
+
 setup(
     name="powdeviceinfo",
     version="0.0.1",
     install_requires=("powguid",),
     packages=find_packages(where="src"),
     package_dir={"": "src"},
+    ext_modules=ext_modules,
 )
@@ -0,0 +1,152 @@
+# cython: language_level=3
+# distutils: libraries = cfgmgr32
+"""cfgmgr32.dllの高速バインディング。
+
+ctypes経由の呼び出しは1呼び出しごとに引数変換のコストがかかるため、
+列挙やプロパティ取得のような繰り返し呼び出される関数をCレベルで束ねます。
+コンパイルできない環境ではpowdeviceinfo.cfgmgrがctypes実装を使います。
+"""
+
+from libc.stddef cimport wchar_t
+
+cdef extern from "Python.h":
+    object PyUnicode_FromWideChar(const wchar_t *w, Py_ssize_t size)
+
+cdef extern from "cfgmgr32.h":
+    ctypedef unsigned long CONFIGRET
+    ctypedef unsigned long DEVINST
+    ctypedef unsigned long DEVPROPTYPE
+    ctypedef unsigned long ULONG
+    ctypedef struct GUID:
+        pass
+    ctypedef struct DEVPROPKEY:
+        pass
+
+    enum:
+        CR_SUCCESS
+        CR_BUFFER_SMALL
+        CR_NO_SUCH_VALUE
+
+    CONFIGRET CM_Enumerate_EnumeratorsW(
+        ULONG index, wchar_t *buf, ULONG *buflen, ULONG flags) nogil
+    CONFIGRET CM_Enumerate_Classes(
+        ULONG index, GUID *classguid, ULONG flags) nogil
+    CONFIGRET CM_Get_DevNode_PropertyW(
+        DEVINST devinst, const DEVPROPKEY *key, DEVPROPTYPE *proptype,
+        unsigned char *buf, ULONG *bufsize, ULONG flags) nogil
+    CONFIGRET CM_Get_Class_PropertyW(
+        const GUID *classguid, const DEVPROPKEY *key, DEVPROPTYPE *proptype,
+        unsigned char *buf, ULONG *bufsize, ULONG flags) nogil
+
+DEF MAX_DEVICE_ID_LEN = 200
+DEF DEVPROPKEY_SIZE = 20  # GUID(16バイト)+pid(4バイト)
+
+
+def enumerate_enumeratorsw(unsigned long index):
+    """(cr, 列挙子名またはNone)を返します。"""
+    cdef wchar_t buf[MAX_DEVICE_ID_LEN]
+    cdef ULONG buflen = MAX_DEVICE_ID_LEN
+    cdef CONFIGRET cr
+    with nogil:
+        cr = CM_Enumerate_EnumeratorsW(index, buf, &buflen, 0)
+    if cr != CR_SUCCESS:
+        return cr, None
+    return cr, PyUnicode_FromWideChar(buf, -1)
+
+
+def enumerate_classes(unsigned long index, unsigned long flags):
+    """(cr, GUIDの16バイトまたはNone)を返します。"""
+    cdef unsigned char guid[16]
+    cdef CONFIGRET cr
+    with nogil:
+        cr = CM_Enumerate_Classes(index, <GUID*>guid, flags)
+    if cr != CR_SUCCESS:
+        return cr, None
+    return cr, (<unsigned char[:16]>guid).tobytes()
+
+
+def get_devnode_propertyw(unsigned long devinst, const unsigned char[::1] key, unsigned long flags):
+    """(cr, プロパティ型, 生の値)を返します。keyはDEVPROPKEYの20バイトです。"""
+    cdef DEVPROPTYPE proptype = 0
+    cdef ULONG size = 0
+    cdef CONFIGRET cr
+    cdef const DEVPROPKEY *pkey = <const DEVPROPKEY*>&key[0]
+    with nogil:
+        cr = CM_Get_DevNode_PropertyW(devinst, pkey, &proptype, NULL, &size, flags)
+    if cr == CR_SUCCESS:
+        # 長さ0のプロパティです。型は本物を返します。
+        return cr, proptype, b""
+    if cr != CR_BUFFER_SMALL:
+        return cr, 0, b""
+
+    value = bytearray(size)
+    cdef unsigned char[::1] view = value
+    with nogil:
+        cr = CM_Get_DevNode_PropertyW(devinst, pkey, &proptype, &view[0], &size, flags)
+    if cr != CR_SUCCESS:
+        return cr, 0, b""
+    return cr, proptype, bytes(value[:size])
+
+
+def get_devnode_props(unsigned long devinst, const unsigned char[::1] keys):
+    """DEVPROPKEYを連結したバッファー内の全キーを一括で取得します。
+
+    キーごとにPythonへ戻らず拡張内で反復し、(cr, プロパティ型, 生の値)の
+    リストを返します。"""
+    cdef Py_ssize_t count = keys.shape[0] // DEVPROPKEY_SIZE
+    cdef Py_ssize_t i
+    cdef const DEVPROPKEY *pkey
+    cdef DEVPROPTYPE proptype
+    cdef ULONG size
+    cdef CONFIGRET cr
+    cdef unsigned char[::1] view
+
+    results = []
+    append = results.append
+    for i in range(count):
+        pkey = <const DEVPROPKEY*>&keys[i * DEVPROPKEY_SIZE]
+        proptype = 0
+        size = 0
+        with nogil:
+            cr = CM_Get_DevNode_PropertyW(devinst, pkey, &proptype, NULL, &size, 0)
+        if cr == CR_SUCCESS:
+            # 長さ0のプロパティです。型は本物を返します。
+            append((cr, proptype, b""))
+            continue
+        if cr != CR_BUFFER_SMALL:
+            append((cr, 0, b""))
+            continue
+
+        value = bytearray(size)
+        view = value
+        with nogil:
+            cr = CM_Get_DevNode_PropertyW(devinst, pkey, &proptype, &view[0], &size, 0)
+        if cr != CR_SUCCESS:
+            append((cr, 0, b""))
+        else:
+            append((cr, proptype, bytes(value[:size])))
+    return results
+
+
+def get_class_propertyw(const unsigned char[::1] guid, const unsigned char[::1] key, unsigned long flags):
+    """(cr, プロパティ型, 生の値)を返します。guidは16バイト、keyは20バイトです。"""
+    cdef DEVPROPTYPE proptype = 0
+    cdef ULONG size = 0
+    cdef CONFIGRET cr
+    cdef const GUID *pguid = <const GUID*>&guid[0]
+    cdef const DEVPROPKEY *pkey = <const DEVPROPKEY*>&key[0]
+    with nogil:
+        cr = CM_Get_Class_PropertyW(pguid, pkey, &proptype, NULL, &size, flags)
+    if cr == CR_SUCCESS:
+        # 長さ0のプロパティです。型は本物を返します。
+        return cr, proptype, b""
+    if cr != CR_BUFFER_SMALL:
+        return cr, 0, b""
+
+    value = bytearray(size)
+    cdef unsigned char[::1] view = value
+    with nogil:
+        cr = CM_Get_Class_PropertyW(pguid, pkey, &proptype, &view[0], &size, flags)
+    if cr != CR_SUCCESS:
+        return cr, 0, b""
+    return cr, proptype, bytes(value[:size])
@@ -1,7 +1,9 @@
-from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from ctypes import (
     POINTER,
     Array,
+    addressof,
     byref,
     c_byte,
     c_int32,
@@ -9,9 +11,15 @@ from ctypes import (
     c_void_p,
     c_wchar,
     c_wchar_p,
+    create_unicode_buffer,
+    sizeof,
+    string_at,
+    wstring_at,
 )
 from enum import IntFlag
-from typing import Iterator, OrderedDict, Self, override
+from functools import lru_cache
+from threading import local
+from typing import Iterator, Self
 
 from powguid import Guid
 
@@ -25,6 +33,56 @@ from ..devprop import (
 )
 from .crresult import CR_BUFFER_SMALL, CR_NO_SUCH_VALUE, CR_SUCCESS
 
+try:
+    # Cython拡張があればctypesの呼び出しコストを省きます。
+    from .. import _cfgmgr_cy
+except ImportError:
+    _cfgmgr_cy = None
+
+
+# cfgmgr32.dllの関数は最初に使うときに束縛します。インポート時に使わない
+# 関数までFuncPtr構築とargtypes設定のコストを払わないための遅延ローダーです。
+_CM_ARGTYPES: dict[str, tuple] = {
+    "CM_Enumerate_EnumeratorsW": (c_uint32, c_wchar_p, POINTER(c_uint32), c_uint32),
+    "CM_Enumerate_Classes": (c_uint32, POINTER(Guid), c_uint32),
+    "CM_Get_Class_Property_Keys": (POINTER(Guid), POINTER(DevicePropertyKey), POINTER(c_uint32), c_uint32),
+    "CM_Get_Class_PropertyW": (
+        POINTER(Guid),
+        POINTER(DevicePropertyKey),
+        POINTER(c_int32),
+        c_void_p,
+        POINTER(c_uint32),
+        c_uint32,
+    ),
+    "CM_Get_Device_ID_List_SizeW": (POINTER(c_uint32), c_wchar_p, c_uint32),
+    "CM_Get_Device_ID_ListW": (c_wchar_p, c_wchar_p, c_uint32, c_uint32),
+    "CM_Locate_DevNodeW": (POINTER(c_int32), c_wchar_p, c_uint32),
+    "CM_Get_DevNode_Property_Keys": (c_int32, POINTER(DevicePropertyKey), POINTER(c_uint32), c_uint32),
+    "CM_Get_DevNode_PropertyW": (
+        c_int32,
+        POINTER(DevicePropertyKey),
+        POINTER(c_int32),
+        c_void_p,
+        POINTER(c_uint32),
+        c_uint32,
+    ),
+}
+
+
+@lru_cache(maxsize=None)
+def _bind(name: str):
+    """cfgmgr32.dllの関数を束縛して返します。結果はキャッシュします。"""
+    fn = getattr(_cfgmgr32, name)
+    fn.argtypes = _CM_ARGTYPES[name]
+    return fn
+
+
+def __getattr__(name: str):
+    # 従来の_CM_*モジュール属性はPEP 562で遅延束縛します。
+    if name.startswith("_CM_") and name[1:] in _CM_ARGTYPES:
+        return _bind(name[1:])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class CMError(Exception):
     cr: int
@@ -34,69 +92,125 @@ class CMError(Exception):
 
     @staticmethod
     def throw_if_failed(cr: int) -> None:
-        if cr != CR_SUCCESS:
-            raise CMError(cr)
+        _throw_if_failed(cr)
 
     @staticmethod
     def throw_ifnot_buffersmall(cr: int) -> None:
-        if cr != CR_BUFFER_SMALL:
-            raise CMError(cr)
+        _throw_ifnot_buffersmall(cr)
+
+
+# 静的メソッド経由の属性参照と呼び出しフレームを避けるためのモジュール
+# レベル版です。頻繁に呼ぶ箇所はこちらを使います。
+def _throw_if_failed(cr: int) -> None:
+    if cr != CR_SUCCESS:
+        raise CMError(cr)
+
+
+def _throw_ifnot_buffersmall(cr: int) -> None:
+    if cr != CR_BUFFER_SMALL:
+        raise CMError(cr)
 
 
 class CMEnumerator:
     __slots__ = ()
 
     @staticmethod
-    def iter() -> Iterator[Guid]:
+    def iter(*, _byref=byref) -> Iterator[Guid]:
+        # ループ内で使う関数はローカル名に束縛してから回します。
+        if _cfgmgr_cy is not None:
+            enumerate_enumeratorsw = _cfgmgr_cy.enumerate_enumeratorsw
+            for i in range(0xFFFFFFFF):
+                cr, name = enumerate_enumeratorsw(i)
+                if cr == CR_NO_SUCH_VALUE:
+                    return
+                _throw_if_failed(cr)
+                yield name
+            raise OverflowError
+
+        _fn = _bind("CM_Enumerate_EnumeratorsW")
         MAX_DEVICE_ID_LEN = 200
-        buf = (c_wchar * MAX_DEVICE_ID_LEN)()
-        buflen = c_uint32()
+        buf = create_unicode_buffer(MAX_DEVICE_ID_LEN)
+        buflen = c_uint32(MAX_DEVICE_ID_LEN)
+        buflen_ref = _byref(buflen)  # byrefをループの外で一度だけ作ります。
         for i in range(0xFFFFFFFF):
             buflen.value = MAX_DEVICE_ID_LEN
-            cr = _CM_Enumerate_EnumeratorsW(i, buf, byref(buflen), 0)
+            cr = _fn(i, buf, buflen_ref, 0)
             if cr == CR_NO_SUCH_VALUE:
                 return
+            _throw_if_failed(cr)
             yield buf.value
         raise OverflowError
 
 
 class CMClass:
-    __slots__ = ("_guid",)
+    __slots__ = ("_guid", "_guid_str", "_tbuf", "_sbuf", "_tref", "_sref")
     _guid: Guid
+    _guid_str: str | None
+
+    # サブクラスが列挙とプロパティ取得に使うフラグです。定数の属性参照
+    # ひとつで読めるよう、メソッドではなくクラス定数で宣言します。
+    CLASS_ENUM_FLAGS: int = 0x00000000
+    CLASS_PROP_FLAGS: int = 0x00000000
 
     def __init__(self, guid: Guid) -> None:
-        self._guid = guid
+        self._guid = Guid.from_buffer_copy(guid)  # 呼び出し元のバッファー使いまわしから守ります。
+        self._guid_str = None
+        # プロパティ取得のたびにc_int32・c_uint32とbyrefを作り直さないための
+        # 出力用バッファーです。呼び出し後に.valueだけを読みます。
+        self._tbuf = c_int32()
+        self._sbuf = c_uint32()
+        self._tref = byref(self._tbuf)
+        self._sref = byref(self._sbuf)
 
     @property
     def guid(self) -> Guid:
         """Guidの複製を返します。"""
         return Guid.from_buffer_copy(self._guid)
 
-    @staticmethod
-    @abstractmethod
-    def classenumflags() -> int: ...
+    @property
+    def guid_str(self) -> str:
+        """Guidの文字列表現を返します。
 
-    @staticmethod
-    @abstractmethod
-    def classpropflags() -> int: ...
+        複製を作らず初回の結果をキャッシュするため、文字列化だけが
+        必要な場合はguidより軽量です。"""
+        s = self._guid_str
+        if s is None:
+            s = self._guid_str = str(self._guid)
+        return s
 
     @classmethod
-    def iter(cls) -> "Iterator[Self]":
-        flags = cls.classenumflags()
+    def iter(cls, *, _byref=byref) -> "Iterator[Self]":
+        flags = cls.CLASS_ENUM_FLAGS
+        if _cfgmgr_cy is not None:
+            enumerate_classes = _cfgmgr_cy.enumerate_classes
+            from_buffer_copy = Guid.from_buffer_copy
+            for i in range(0xFFFFFFFF):
+                cr, raw = enumerate_classes(i, flags)
+                if cr == CR_NO_SUCH_VALUE:
+                    return
+                _throw_if_failed(cr)
+                yield cls(from_buffer_copy(raw))
+            raise OverflowError
+
+        _fn = _bind("CM_Enumerate_Classes")
+        guid = Guid()  # __init__が複製するため使いまわせます。
+        guid_ref = _byref(guid)
         for i in range(0xFFFFFFFF):
-            guid = Guid()  # 使いまわすと作成したインスタンスのguidがすべて変わります。
-            cr = _CM_Enumerate_Classes(i, byref(guid), flags)
+            cr = _fn(i, guid_ref, flags)
             if cr == CR_NO_SUCH_VALUE:
                 return
+            _throw_if_failed(cr)
             yield cls(guid)
         raise OverflowError
 
     @property
     def propkeycount(self) -> int:
-        flags = self.classpropflags()
+        flags = self.CLASS_PROP_FLAGS
 
-        c = c_uint32()
-        cr = _CM_Get_Class_Property_Keys(self._guid, None, byref(c), flags)
+        # バッファーがNULLの呼び出しは入出力サイズを0にする約束です。
+        c = self._sbuf
+        c.value = 0
+        cr = _bind("CM_Get_Class_Property_Keys")(self._guid, None, self._sref, flags)
         if cr == CR_SUCCESS or cr == CR_BUFFER_SMALL:
             return c.value
         else:
@@ -104,50 +218,72 @@ class CMClass:
 
     @property
     def propkeys(self) -> tuple[DevicePropertyKey, ...]:
-        flags = self.classpropflags()
+        flags = self.CLASS_PROP_FLAGS
 
-        c = c_uint32()
-        cr = _CM_Get_Class_Property_Keys(self._guid, None, byref(c), flags)
+        _fn = _bind("CM_Get_Class_Property_Keys")
+        c = self._sbuf
+        c.value = 0
+        cr = _fn(self._guid, None, self._sref, flags)
         if cr == CR_SUCCESS:
             return ()
         elif cr != CR_BUFFER_SMALL:
             raise CMError(cr)
 
         keys = (DevicePropertyKey * c.value)()
-        cr = _CM_Get_Class_Property_Keys(self._guid, keys, byref(c), flags)
+        cr = _fn(self._guid, keys, self._sref, flags)
         if cr != CR_SUCCESS:
             raise CMError(cr)
         return tuple(keys)
 
     def get_prop(self, key: DevicePropertyKey) -> DeviceProperty:
-        flags = self.classpropflags()
-
-        type = c_int32()
-        bufsize = c_uint32()
-        CMError.throw_ifnot_buffersmall(
-            _CM_Get_Class_PropertyW(self._guid, key, byref(type), None, byref(bufsize), flags)
-        )
+        flags = self.CLASS_PROP_FLAGS
+
+        if _cfgmgr_cy is not None:
+            cr, type_, value = _cfgmgr_cy.get_class_propertyw(bytes(self._guid), bytes(key), flags)
+            _throw_if_failed(cr)
+            return DeviceProperty(key, DevicePropertyType(type_), value)
+
+        _fn = _bind("CM_Get_Class_PropertyW")
+        type = self._tbuf
+        bufsize = self._sbuf
+        bufsize.value = 0
+        cr = _fn(self._guid, key, self._tref, None, self._sref, flags)
+        if cr == CR_SUCCESS:
+            # 長さ0のプロパティです。
+            return DeviceProperty(key, DevicePropertyType(type.value), b"")
+        _throw_ifnot_buffersmall(cr)
 
         buf = (c_byte * bufsize.value)()
-        CMError.throw_if_failed(_CM_Get_Class_PropertyW(self._guid, key, byref(type), buf, byref(bufsize), flags))
+        _throw_if_failed(_fn(self._guid, key, self._tref, buf, self._sref, flags))
 
-        return DeviceProperty(key, DevicePropertyType(type.value), bytes(buf))
+        return DeviceProperty(key, DevicePropertyType(type.value), string_at(buf, bufsize.value))
 
     def get_prop_or_none(self, key: DevicePropertyKey) -> DeviceProperty | None:
-        flags = self.classpropflags()
-
-        type = c_int32()
-        bufsize = c_uint32()
-        cr = _CM_Get_Class_PropertyW(self._guid, key, byref(type), None, byref(bufsize), flags)
+        flags = self.CLASS_PROP_FLAGS
+
+        if _cfgmgr_cy is not None:
+            cr, type_, value = _cfgmgr_cy.get_class_propertyw(bytes(self._guid), bytes(key), flags)
+            if cr != CR_SUCCESS:
+                return None
+            return DeviceProperty(key, DevicePropertyType(type_), value)
+
+        _fn = _bind("CM_Get_Class_PropertyW")
+        type = self._tbuf
+        bufsize = self._sbuf
+        bufsize.value = 0
+        cr = _fn(self._guid, key, self._tref, None, self._sref, flags)
+        if cr == CR_SUCCESS:
+            # 長さ0のプロパティです。
+            return DeviceProperty(key, DevicePropertyType(type.value), b"")
         if cr != CR_BUFFER_SMALL:
             return None
 
         buf = (c_byte * bufsize.value)()
-        cr = _CM_Get_Class_PropertyW(self._guid, key, byref(type), buf, byref(bufsize), flags)
+        cr = _fn(self._guid, key, self._tref, buf, self._sref, flags)
         if cr != CR_SUCCESS:
             return None
 
-        return DeviceProperty(key, DevicePropertyType(type.value), bytes(buf))
+        return DeviceProperty(key, DevicePropertyType(type.value), string_at(buf, bufsize.value))
 
     @property
     def props(self) -> tuple[DeviceProperty, ...]:
@@ -167,17 +303,8 @@ class CMClass:
 class CMSetupClass(CMClass):
     __slots__ = ()
 
-    @override
-    @staticmethod
-    def classenumflags() -> int:
-        CM_ENUMERATE_CLASSES_INSTALLER = 0x00000000
-        return CM_ENUMERATE_CLASSES_INSTALLER
-
-    @override
-    @staticmethod
-    def classpropflags() -> int:
-        CM_CLASS_PROPERTY_INSTALLER = 0x00000000
-        return CM_CLASS_PROPERTY_INSTALLER
+    CLASS_ENUM_FLAGS = 0x00000000  # CM_ENUMERATE_CLASSES_INSTALLER
+    CLASS_PROP_FLAGS = 0x00000000  # CM_CLASS_PROPERTY_INSTALLER
 
     @property
     def classname_or_none(self) -> str | None:
@@ -192,28 +319,34 @@ class CMSetupClass(CMClass):
                     return cls
             return None
         else:
-            classname = str(classname).lower()
-            for cls in CMSetupClass.iter():
-                clsname = cls.classname_or_none
-                if clsname is not None and clsname.lower() == classname:
-                    return cls
-            return None
+            guid = _resolve_setupclass_guid(str(classname).lower())
+            return CMSetupClass(guid) if guid is not None else None
+
+
+@lru_cache(maxsize=1)
+def _setupclass_name_index() -> dict[str, Guid]:
+    """小文字化したクラス名からGuidへの索引です。
+
+    初回だけ全セットアップクラスを列挙して構築し、以降の解決は
+    辞書参照ひとつで済ませます。結果はプロセス内で安定です。"""
+    index: dict[str, Guid] = {}
+    for cls in CMSetupClass.iter():
+        clsname = cls.classname_or_none
+        if clsname is not None:
+            index[clsname.lower()] = cls.guid
+    return index
+
+
+def _resolve_setupclass_guid(classname_lower: str) -> Guid | None:
+    """小文字化したクラス名からセットアップクラスのGuidを解決します。"""
+    return _setupclass_name_index().get(classname_lower)
 
 
 class CMInterfaceClass(CMClass):
     __slots__ = ()
 
-    @override
-    @staticmethod
-    def classenumflags() -> int:
-        CM_ENUMERATE_CLASSES_INTERFACE = 0x00000001
-        return CM_ENUMERATE_CLASSES_INTERFACE
-
-    @override
-    @staticmethod
-    def classpropflags() -> int:
-        CM_CLASS_PROPERTY_INTERFACE = 0x00000001
-        return CM_CLASS_PROPERTY_INTERFACE
+    CLASS_ENUM_FLAGS = 0x00000001  # CM_ENUMERATE_CLASSES_INTERFACE
+    CLASS_PROP_FLAGS = 0x00000001  # CM_CLASS_PROPERTY_INTERFACE
 
 
 class CMLocateFlag(IntFlag):
@@ -227,43 +360,79 @@ class CMDeviceID:
     __slots__ = ()
 
     @staticmethod
-    def __getdeviceidlist_worker(filter: str | None, flags: int, presents_only: bool) -> list[str]:
+    def _iter_deviceids(filter: str | None, flags: int, presents_only: bool) -> Iterator[str]:
+        """IDリストのバッファーからIDを1つずつ遅延デコードして返します。
+
+        バッファー全体を一度に文字列化せず、必要になったIDだけを
+        wstring_atで切り出します。途中で打ち切っても残りのデコード
+        コストを払いません。"""
         CM_GETIDLIST_FILTER_PRESENT = 0x00000100
         if presents_only:
             flags |= CM_GETIDLIST_FILTER_PRESENT
 
         cb = c_uint32()
-        CMError.throw_if_failed(_CM_Get_Device_ID_List_SizeW(byref(cb), filter, flags))
-
-        len = cb.value
-        buf = (c_wchar * len)()
-        CMError.throw_if_failed(_CM_Get_Device_ID_ListW(filter, buf, len, flags))
-        return bytes(buf)[:-4].decode("utf-16le").split("\0")
+        _throw_if_failed(_bind("CM_Get_Device_ID_List_SizeW")(byref(cb), filter, flags))
+
+        cch = cb.value
+        buf = (c_wchar * cch)()
+        _throw_if_failed(_bind("CM_Get_Device_ID_ListW")(filter, buf, cch, flags))
+
+        base = addressof(buf)
+        cb_wchar = sizeof(c_wchar)
+        pos = 0
+        end = cch - 1  # 末尾の二重終端
+        while pos < end:
+            id = wstring_at(base + pos * cb_wchar)
+            if not id:
+                return
+            yield id
+            pos += len(id) + 1
 
     @staticmethod
     def iter_all(presents_only: bool = False) -> Iterator[str]:
         CM_GETIDLIST_FILTER_NONE = 0x00000000
-        yield from CMDeviceID.__getdeviceidlist_worker(None, CM_GETIDLIST_FILTER_NONE, presents_only)
+        return CMDeviceID._iter_deviceids(None, CM_GETIDLIST_FILTER_NONE, presents_only)
 
     @staticmethod
     def iter_by_enumerator(enumerator: str, presents_only: bool) -> Iterator[str]:
         CM_GETIDLIST_FILTER_ENUMERATOR = 0x00000001
-        yield from CMDeviceID.__getdeviceidlist_worker(enumerator, CM_GETIDLIST_FILTER_ENUMERATOR, presents_only)
+        return CMDeviceID._iter_deviceids(enumerator, CM_GETIDLIST_FILTER_ENUMERATOR, presents_only)
 
     @staticmethod
     def iter_by_class(enumerator: str, presents_only: bool) -> Iterator[str]:
         CM_GETIDLIST_FILTER_CLASS = 0x00000200
-        yield from CMDeviceID.__getdeviceidlist_worker(enumerator, CM_GETIDLIST_FILTER_CLASS, presents_only)
+        return CMDeviceID._iter_deviceids(enumerator, CM_GETIDLIST_FILTER_CLASS, presents_only)
 
 
 class CMDevice:
-    __slots__ = ("__devinst",)
+    __slots__ = ("__devinst", "_tbuf", "_sbuf", "_tref", "_sref")
     __devinst: int
 
+    # 大半のプロパティが収まる使いまわしバッファー。取得のたびの確保と
+    # サイズ問い合わせ呼び出しを省きます。収まらない場合だけ確保し直します。
+    # iter_allがスレッドを使うため、共有せずスレッドごとに持ちます。
+    _tls = local()
+
+    @staticmethod
+    def _scratch() -> Array[c_byte]:
+        tls = CMDevice._tls
+        try:
+            return tls.scratch
+        except AttributeError:
+            buf = (c_byte * 4096)()
+            tls.scratch = buf
+            return buf
+
     def __init__(self, id: str, flags: CMLocateFlag | int = CMLocateFlag.NORMAL) -> None:
         x = c_int32()
-        CMError.throw_if_failed(_CM_Locate_DevNodeW(byref(x), id, int(flags)))
+        _throw_if_failed(_bind("CM_Locate_DevNodeW")(byref(x), id, int(flags)))
         self.__devinst = x.value
+        # プロパティ取得のたびにc_int32・c_uint32とbyrefを作り直さないための
+        # 出力用バッファーです。呼び出し後に.valueだけを読みます。
+        self._tbuf = c_int32()
+        self._sbuf = c_uint32()
+        self._tref = byref(self._tbuf)
+        self._sref = byref(self._sbuf)
 
     @property
     def devinst(self) -> int:
@@ -271,28 +440,54 @@ class CMDevice:
 
     @staticmethod
     def iter_all(presents_only: bool = False) -> Iterator["CMDevice"]:
-        return (CMDevice(id) for id in CMDeviceID.iter_all(presents_only))
+        CM_GETIDLIST_FILTER_NONE = 0x00000000
+        ids = CMDeviceID._iter_deviceids(None, CM_GETIDLIST_FILTER_NONE, presents_only)
+        # ctypesは外部呼び出し中にGILを解放するため、デバイスごとの
+        # CM_Locate_DevNodeWをスレッドプールで重ねて待ち時間を隠します。
+        # 全IDを先に投入すると途中で列挙をやめても残りの完了を待って
+        # しまうため、仕掛かりをワーカー数の2倍までに抑えます。
+        executor = ThreadPoolExecutor(max_workers=8)
+        try:
+            pending: deque = deque()
+            submit = executor.submit
+            for id in ids:
+                pending.append(submit(CMDevice, id))
+                if len(pending) >= 16:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     @staticmethod
     def iter_deviceid_by_enumerator(enumerator: str, presents_only: bool) -> Iterator["CMDevice"]:
-        return (CMDevice(id) for id in CMDeviceID.iter_by_enumerator(enumerator, presents_only))
+        device = CMDevice
+        return (device(id) for id in CMDeviceID.iter_by_enumerator(enumerator, presents_only))
 
     @staticmethod
     def iter_deviceid_by_classid(classid: str, presents_only: bool) -> Iterator["CMDevice"]:
-        return (CMDevice(id) for id in CMDeviceID.iter_by_class(classid, presents_only))
+        device = CMDevice
+        return (device(id) for id in CMDeviceID.iter_by_class(classid, presents_only))
 
     @staticmethod
     def iter_deviceid_by_classguid(classguid: Guid, presents_only: bool) -> Iterator["CMDevice"]:
-        return (CMDevice(id) for id in CMDeviceID.iter_by_class(str(classguid), presents_only))
+        device = CMDevice
+        return (device(id) for id in CMDeviceID.iter_by_class(str(classguid), presents_only))
 
     @staticmethod
     def iter_deviceid_by_class(class_: CMSetupClass, presents_only: bool) -> Iterator["CMDevice"]:
-        return CMDevice.iter_deviceid_by_classguid(class_.guid, presents_only)
+        # guidプロパティの複製を介さず、キャッシュ済みの文字列を使います。
+        return CMDevice.iter_deviceid_by_classid(class_.guid_str, presents_only)
 
     @staticmethod
     def iter_deviceid_by_classname(
         classname: str, presents_only: bool, ignorecase: bool = True
     ) -> Iterator["CMDevice"]:
+        if ignorecase:
+            guid = _resolve_setupclass_guid(str(classname).lower())
+            if guid is None:
+                raise ValueError
+            return CMDevice.iter_deviceid_by_classguid(guid, presents_only)
         class_ = CMSetupClass.find_by_classname(classname, ignorecase)
         if class_ is None:
             raise ValueError
@@ -300,109 +495,144 @@ class CMDevice:
 
     @property
     def propkeyscount(self) -> int:
-        c = c_uint32()
-        CMError.throw_ifnot_buffersmall(_CM_Get_DevNode_Property_Keys(self.__devinst, None, byref(c), 0))
+        # バッファーがNULLの呼び出しは入出力サイズを0にする約束です。
+        c = self._sbuf
+        c.value = 0
+        _throw_ifnot_buffersmall(_bind("CM_Get_DevNode_Property_Keys")(self.__devinst, None, self._sref, 0))
         return c.value
 
     @property
     def propkeys(self) -> tuple[DevicePropertyKey, ...]:
-        c = c_uint32()
-        CMError.throw_ifnot_buffersmall(_CM_Get_DevNode_Property_Keys(self.__devinst, None, byref(c), 0))
+        _fn = _bind("CM_Get_DevNode_Property_Keys")
+        c = self._sbuf
+        c.value = 0
+        _throw_ifnot_buffersmall(_fn(self.__devinst, None, self._sref, 0))
 
         keys = (DevicePropertyKey * c.value)()
-        CMError.throw_if_failed(_CM_Get_DevNode_Property_Keys(self.__devinst, keys, byref(c), 0))
+        _throw_if_failed(_fn(self.__devinst, keys, self._sref, 0))
         return tuple(keys)
 
     def get_prop(self, key: DevicePropertyKey) -> DeviceProperty:
-        type = c_int32()
-        size = c_uint32()
-        CMError.throw_ifnot_buffersmall(
-            _CM_Get_DevNode_PropertyW(self.__devinst, key, byref(type), None, byref(size), 0)
-        )
+        if _cfgmgr_cy is not None:
+            cr, type_, value = _cfgmgr_cy.get_devnode_propertyw(self.__devinst, bytes(key), 0)
+            _throw_if_failed(cr)
+            return DeviceProperty(key, DevicePropertyType(type_), value)
+
+        _fn = _bind("CM_Get_DevNode_PropertyW")
+        type = self._tbuf
+        scratch = CMDevice._scratch()
+        size = self._sbuf
+        size.value = sizeof(scratch)
+        cr = _fn(self.__devinst, key, self._tref, scratch, self._sref, 0)
+        if cr == CR_SUCCESS:
+            return DeviceProperty(key, DevicePropertyType(type.value), string_at(scratch, size.value))
+        elif cr != CR_BUFFER_SMALL:
+            raise CMError(cr)
 
         buf: Array[c_byte] = (c_byte * size.value)()
-        CMError.throw_if_failed(_CM_Get_DevNode_PropertyW(self.__devinst, key, byref(type), buf, byref(size), 0))
-        return DeviceProperty(key, DevicePropertyType(type.value), bytes(buf))
+        _throw_if_failed(_fn(self.__devinst, key, self._tref, buf, self._sref, 0))
+        return DeviceProperty(key, DevicePropertyType(type.value), string_at(buf, size.value))
 
     def get_prop_or_none(self, key: DevicePropertyKey) -> DeviceProperty | None:
-        type = c_int32()
-        size = c_uint32()
-        cr = _CM_Get_DevNode_PropertyW(self.__devinst, key, byref(type), None, byref(size), 0)
-        if cr != CR_BUFFER_SMALL:
+        if _cfgmgr_cy is not None:
+            cr, type_, value = _cfgmgr_cy.get_devnode_propertyw(self.__devinst, bytes(key), 0)
+            if cr != CR_SUCCESS:
+                return None
+            return DeviceProperty(key, DevicePropertyType(type_), value)
+
+        _fn = _bind("CM_Get_DevNode_PropertyW")
+        type = self._tbuf
+        scratch = CMDevice._scratch()
+        size = self._sbuf
+        size.value = sizeof(scratch)
+        cr = _fn(self.__devinst, key, self._tref, scratch, self._sref, 0)
+        if cr == CR_SUCCESS:
+            return DeviceProperty(key, DevicePropertyType(type.value), string_at(scratch, size.value))
+        elif cr != CR_BUFFER_SMALL:
             return None
 
         buf: Array[c_byte] = (c_byte * size.value)()
-        cr = _CM_Get_DevNode_PropertyW(self.__devinst, key, byref(type), buf, byref(size), 0)
+        cr = _fn(self.__devinst, key, self._tref, buf, self._sref, 0)
         if cr != CR_SUCCESS:
             return None
-        return DeviceProperty(key, DevicePropertyType(type.value), bytes(buf))
+        return DeviceProperty(key, DevicePropertyType(type.value), string_at(buf, size.value))
+
+    def _get_str_prop(self, key: DevicePropertyKey) -> str | None:
+        """文字列プロパティをDevicePropertyを介さずに取得します。
+
+        名前のような頻出プロパティ用の近道です。bytesの複製と
+        DevicePropertyの構築を省き、バッファーから直接strを作ります。
+        プロパティがない場合や文字列型でない場合はNoneを返します。
+        例外を構築しないため列挙ループでも軽量です。"""
+        if _cfgmgr_cy is not None:
+            cr, type_, value = _cfgmgr_cy.get_devnode_propertyw(self.__devinst, bytes(key), 0)
+            if cr != CR_SUCCESS or type_ != DevicePropertyType.STRING:
+                return None
+            return value[:-2].decode("utf-16le")
+
+        _fn = _bind("CM_Get_DevNode_PropertyW")
+        type = self._tbuf
+        scratch = CMDevice._scratch()
+        size = self._sbuf
+        size.value = sizeof(scratch)
+        cr = _fn(self.__devinst, key, self._tref, scratch, self._sref, 0)
+        if cr == CR_BUFFER_SMALL:
+            buf: Array[c_byte] = (c_byte * size.value)()
+            cr = _fn(self.__devinst, key, self._tref, buf, self._sref, 0)
+            if cr != CR_SUCCESS or type.value != DevicePropertyType.STRING:
+                return None
+            return wstring_at(buf, size.value // 2 - 1)
+        if cr != CR_SUCCESS or type.value != DevicePropertyType.STRING:
+            return None
+        if size.value < 2:
+            # 長さ0の文字列です。使いまわしバッファーを走査させません。
+            return ""
+        return wstring_at(scratch, size.value // 2 - 1)
 
     @property
     def name_or_none(self) -> str | None:
-        prop = self.get_prop(DevicePropertyKeys.NAME)
-        return prop.str_or_none if prop else None
+        return self._get_str_prop(DevicePropertyKeys.NAME)
 
     @property
     def instanceid_or_none(self) -> str | None:
-        prop = self.get_prop(DevicePropertyKeys.INSTANCE_ID)
-        return prop.str_or_none if prop else None
+        return self._get_str_prop(DevicePropertyKeys.INSTANCE_ID)
 
     @property
     def description_or_none(self) -> str | None:
-        prop = self.get_prop(DevicePropertyKeys.DEVICE_DESC)
-        return prop.str_or_none if prop else None
-
-    @property
-    def props_iter(self) -> Iterator[tuple[DevicePropertyKey, DeviceProperty]]:
-        get_prop = self.get_prop
-        return ((key, get_prop(key)) for key in self.propkeys)
-
-    @property
-    def props(self) -> tuple[tuple[DevicePropertyKey, DeviceProperty], ...]:
-        return tuple(self.props_iter)
-
-    @property
-    def propdict(self) -> OrderedDict[DevicePropertyKey, DeviceProperty]:
-        return OrderedDict(self.props_iter)
+        return self._get_str_prop(DevicePropertyKeys.DEVICE_DESC)
 
+    def iter_props(self) -> Iterator[tuple[DevicePropertyKey, DeviceProperty]]:
+        """キーの列挙とプロパティの取得をひとつのループで行います。
 
-_CM_Enumerate_EnumeratorsW = _cfgmgr32.CM_Enumerate_EnumeratorsW
-_CM_Enumerate_EnumeratorsW.argtypes = (c_uint32, c_wchar_p, POINTER(c_uint32), c_uint32)
+        propkeysのようにキー配列をタプル化せず、ctypes配列から直接
+        読み取って順に取得します。"""
+        _fn = _bind("CM_Get_DevNode_Property_Keys")
+        self._sbuf.value = 0
+        _throw_ifnot_buffersmall(_fn(self.__devinst, None, self._sref, 0))
 
-_CM_Enumerate_Classes = _cfgmgr32.CM_Enumerate_Classes
-_CM_Enumerate_Classes.argtypes = (c_uint32, POINTER(Guid), c_uint32)
+        keys = (DevicePropertyKey * self._sbuf.value)()
+        _throw_if_failed(_fn(self.__devinst, keys, self._sref, 0))
 
-_CM_Get_Class_Property_Keys = _cfgmgr32.CM_Get_Class_Property_Keys
-_CM_Get_Class_Property_Keys.argtypes = (POINTER(Guid), POINTER(DevicePropertyKey), POINTER(c_uint32), c_uint32)
+        if _cfgmgr_cy is not None:
+            # 全キーを拡張内で一括取得し、キーごとのPython往復を省きます。
+            for key, (cr, type_, value) in zip(keys, _cfgmgr_cy.get_devnode_props(self.__devinst, bytes(keys))):
+                _throw_if_failed(cr)
+                yield key, DeviceProperty(key, DevicePropertyType(type_), value)
+            return
 
-_CM_Get_Class_PropertyW = _cfgmgr32.CM_Get_Class_PropertyW
-_CM_Get_Class_PropertyW.argtypes = (
-    POINTER(Guid),
-    POINTER(DevicePropertyKey),
-    POINTER(c_int32),
-    c_void_p,
-    POINTER(c_uint32),
-    c_uint32,
-)
-
-_CM_Get_Device_ID_List_SizeW = _cfgmgr32.CM_Get_Device_ID_List_SizeW
-_CM_Get_Device_ID_List_SizeW.argtypes = (POINTER(c_uint32), c_wchar_p, c_uint32)
-
-_CM_Get_Device_ID_ListW = _cfgmgr32.CM_Get_Device_ID_ListW
-_CM_Get_Device_ID_ListW.argtypes = (c_wchar_p, c_wchar_p, c_uint32, c_uint32)
+        get_prop = self.get_prop
+        for key in keys:
+            yield key, get_prop(key)
 
-_CM_Locate_DevNodeW = _cfgmgr32.CM_Locate_DevNodeW
-_CM_Locate_DevNodeW.argtypes = (POINTER(c_int32), c_wchar_p, c_uint32)
+    @property
+    def props_iter(self) -> Iterator[tuple[DevicePropertyKey, DeviceProperty]]:
+        return self.iter_props()
 
-_CM_Get_DevNode_Property_Keys = _cfgmgr32.CM_Get_DevNode_Property_Keys
-_CM_Get_DevNode_Property_Keys.argtypes = (c_int32, POINTER(DevicePropertyKey), POINTER(c_uint32), c_uint32)
+    @property
+    def props(self) -> tuple[tuple[DevicePropertyKey, DeviceProperty], ...]:
+        return tuple(self.iter_props())
 
-_CM_Get_DevNode_PropertyW = _cfgmgr32.CM_Get_DevNode_PropertyW
-_CM_Get_DevNode_PropertyW.argtypes = (
-    c_int32,
-    POINTER(DevicePropertyKey),
-    POINTER(c_int32),
-    c_void_p,
-    POINTER(c_uint32),
-    c_uint32,
-)
+    @property
+    def propdict(self) -> dict[DevicePropertyKey, DeviceProperty]:
+        # Python 3.7以降のdictは挿入順を保持し、OrderedDictより軽量です。
+        return dict(self.iter_props())